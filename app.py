@@ -1,10 +1,20 @@
 import os
+
+# one core per worker process: keep OpenMP from oversubscribing when run
+# under a multi-process server (set before numpy/cv2 are imported)
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+import hashlib
 import cv2
+import numpy as np
 from flask import Flask, render_template, flash, request, send_file
+from flask_caching import Cache
 from werkzeug.utils import secure_filename
 from utils import embed_message, extract_message
 from metrics import evaluate_performance
 
+cv2.setNumThreads(1)
+
 app = Flask(__name__)
 app.secret_key = "your_secret_key"
 
@@ -16,6 +26,21 @@ os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["OUTPUT_FOLDER"] = OUTPUT_FOLDER
 
+# decoded messages and metrics, keyed on upload content hashes
+cache = Cache(app, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 300})
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _decode_image(data):
+    """Decode raw upload bytes to a BGR image (None if empty or unreadable)."""
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
 @app.route("/")
 def home():
     return render_template("index.html", active_tab="home")
@@ -35,10 +60,7 @@ def encode():
         return render_template("index.html", active_tab="sender")
 
     filename = secure_filename(image_file.filename)
-    in_path = os.path.join(UPLOAD_FOLDER, filename)
-    image_file.save(in_path)
-
-    img = cv2.imread(in_path)
+    img = _decode_image(image_file.read())
     if img is None:
         flash("Error: could not read uploaded image.", "danger")
         return render_template("index.html", active_tab="sender")
@@ -51,10 +73,13 @@ def encode():
 
     out_name = f"stego_{filename}"
     out_path = os.path.join(OUTPUT_FOLDER, out_name)
-    success = cv2.imwrite(out_path, stego)
+    # encode once; the same file backs both the preview and the download link
+    success, encoded = cv2.imencode(os.path.splitext(out_name)[1] or ".png", stego)
     if not success:
         flash("Error: could not save stego image.", "danger")
         return render_template("index.html", active_tab="sender")
+    with open(out_path, "wb") as f:
+        f.write(encoded.tobytes())
 
     flash("Stego image generated successfully.", "success")
     return render_template(
@@ -68,7 +93,7 @@ def encode():
 @app.route("/download/<filename>")
 def download_file(filename):
     path = os.path.join(OUTPUT_FOLDER, filename)
-    return send_file(path, as_attachment=True)
+    return send_file(path, as_attachment=True, conditional=True)
 
 
 # ---------------- Receiver ----------------
@@ -81,20 +106,21 @@ def decode():
         flash("Stego image is required", "danger")
         return render_template("index.html", active_tab="receiver")
 
-    filename = secure_filename(stego_file.filename)
-    in_path = os.path.join(UPLOAD_FOLDER, filename)
-    stego_file.save(in_path)
-
-    stego = cv2.imread(in_path)
-    if stego is None:
-        flash("Error: could not read stego image.", "danger")
-        return render_template("index.html", active_tab="receiver")
-
-    try:
-        message = extract_message(stego, key)
-    except Exception as e:
-        flash(f"Extraction error: {e}", "danger")
-        return render_template("index.html", active_tab="receiver")
+    data = stego_file.read()
+    cache_key = f"extract:{_digest(data)}:{_digest(key.encode())}"
+    message = cache.get(cache_key)
+    if message is None:
+        stego = _decode_image(data)
+        if stego is None:
+            flash("Error: could not read stego image.", "danger")
+            return render_template("index.html", active_tab="receiver")
+
+        try:
+            message = extract_message(stego, key)
+        except Exception as e:
+            flash(f"Extraction error: {e}", "danger")
+            return render_template("index.html", active_tab="receiver")
+        cache.set(cache_key, message)
 
     flash("Message extracted successfully.", "success")
     return render_template(
@@ -118,16 +144,25 @@ def performance():
     stego_filename = secure_filename(stego_file.filename)
     orig_path = os.path.join(UPLOAD_FOLDER, orig_filename)
     stego_path = os.path.join(UPLOAD_FOLDER, stego_filename)
-    orig_file.save(orig_path)
-    stego_file.save(stego_path)
-
-    original = cv2.imread(orig_path)
-    stego = cv2.imread(stego_path)
-    if original is None or stego is None:
-        flash("Error: could not read one of the images.", "danger")
-        return render_template("index.html", active_tab="performance")
-
-    metrics = evaluate_performance(original, stego)
+    # uploads are kept on disk for the preview, but decoded from memory
+    orig_bytes = orig_file.read()
+    stego_bytes = stego_file.read()
+    with open(orig_path, "wb") as f:
+        f.write(orig_bytes)
+    with open(stego_path, "wb") as f:
+        f.write(stego_bytes)
+
+    cache_key = f"metrics:{_digest(orig_bytes)}:{_digest(stego_bytes)}"
+    metrics = cache.get(cache_key)
+    if metrics is None:
+        original = _decode_image(orig_bytes)
+        stego = _decode_image(stego_bytes)
+        if original is None or stego is None:
+            flash("Error: could not read one of the images.", "danger")
+            return render_template("index.html", active_tab="performance")
+
+        metrics = evaluate_performance(original, stego)
+        cache.set(cache_key, metrics)
 
     return render_template(
         "index.html",
@@ -139,4 +174,6 @@ def performance():
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # development server only; for concurrent requests use e.g.
+    #   gunicorn -w $(nproc) -k gthread --threads 2 app:app
+    app.run()
@@ -0,0 +1,14 @@
+import pytest
+
+import lsb_dct
+
+
+@pytest.fixture(params=["numba", "numpy"])
+def dct_backend(request, monkeypatch):
+    """Run a test against the Numba kernel and against the NumPy fallback."""
+    if request.param == "numba":
+        if lsb_dct._dct_embed_nb_8x8 is None:
+            pytest.skip("numba not installed")
+    else:
+        monkeypatch.setattr(lsb_dct, "_dct_embed_nb_8x8", None)
+    return request.param
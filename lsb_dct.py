@@ -1,114 +1,212 @@
 # lsb_dct.py
-import cv2
+import functools
+import math
 import numpy as np
+from scipy.fft import dct
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy path below is used instead
+    njit = None
 
 # ===============================
 # LSB functions (operate on single-channel arrays)
 # ===============================
 def lsb_embed(channel_image, message_bits, start=0):
     """
-    Embed list-of-bits (0/1) into the LSBs of a single-channel image (uint8).
-    Returns a new uint8 image.
+    Embed bits (0/1) into the LSBs of a single-channel image (uint8).
+    Modifies `channel_image` in place (it may be a strided channel view) and returns it.
     """
     if channel_image is None:
         raise ValueError("channel_image is None")
-    flat = channel_image.flatten().astype(np.uint8)
-    bits = [int(b) for b in message_bits]
+    bits = np.asarray(message_bits, dtype=np.uint8) & 1
 
-    if start + len(bits) > flat.size:
+    if start + bits.size > channel_image.size:
         raise ValueError("LSB capacity too small for this payload part.")
 
+    # 1-D view (stride 3 for a channel slice of a contiguous BGR image), updated in place
+    flat = channel_image.reshape(-1)
     mask = np.uint8(0xFE)  # 1111 1110
-    for i, bit in enumerate(bits):
-        idx = start + i
-        flat[idx] = (flat[idx] & mask) | (bit & 1)
-
-    return flat.reshape(channel_image.shape).astype(np.uint8)
+    stop = start + bits.size
+    flat[start:stop] &= mask
+    flat[start:stop] |= bits
+    if not np.may_share_memory(flat, channel_image):
+        # layout couldn't be viewed as 1-D, so reshape copied; write the result back
+        channel_image[...] = flat.reshape(channel_image.shape)
+    return channel_image
 
 
 def lsb_extract(channel_image, length, start=0):
     """
-    Extract `length` bits from LSBs of single-channel image, returns list of ints (0/1).
+    Extract `length` bits from LSBs of single-channel image, returns uint8 array of bits (0/1).
     """
-    flat = channel_image.flatten()
-    if start >= flat.size:
-        return []
-    length = min(length, flat.size - start)
-    return [int(flat[start + i] & 1) for i in range(length)]
+    if start >= channel_image.size:
+        return np.zeros(0, dtype=np.uint8)
+    length = min(length, channel_image.size - start)
+    flat = channel_image.reshape(-1)
+    return flat[start:start + length] & np.uint8(1)
 
 
 # ===============================
 # DCT functions (8x8 blocks; one bit per block using parity of a mid-band coef)
 # ===============================
+@functools.lru_cache(maxsize=None)
+def _dct_basis(block_size):
+    """
+    Orthonormal DCT-II matrix C (float32) so that the 2D DCT of a block X is C @ X @ C.T.
+    """
+    basis = dct(np.eye(block_size), type=2, norm='ortho', axis=0).astype(np.float32)
+    basis.flags.writeable = False
+    return basis
+
+
+def _block_view(gray_image, block_size):
+    """
+    View the full blocks of a single-channel image as a (blocks_y, blocks_x, bs, bs) array.
+    Writes into the view go straight to `gray_image`.
+    """
+    h, w = gray_image.shape
+    blocks_y, blocks_x = h // block_size, w // block_size
+    cropped = gray_image[:blocks_y * block_size, :blocks_x * block_size]
+    return cropped.reshape(blocks_y, block_size, blocks_x, block_size).swapaxes(1, 2)
+
+
+@functools.lru_cache(maxsize=None)
+def _coef44_weights(block_size):
+    """
+    Pixel weights of coefficient (4,4): D[4,4] = sum(W * X), W = outer(C[4], C[4]).
+    Built from the float64 basis so the 8x8 weights are exactly +/-0.125: the
+    coefficient of integer pixels is then an exact multiple of 1/8 in float32,
+    whatever the summation order.
+    """
+    c4 = dct(np.eye(block_size), type=2, norm='ortho', axis=0)[4]
+    weights = np.outer(c4, c4).astype(np.float32)
+    weights.flags.writeable = False
+    return weights
+
+
+# weights of coefficient (4,4) for 8x8 blocks, and their signs: a +/-1 pixel step
+# along _W44_SIGN_8 moves D[4,4] by exactly +/-1/8
+_W44_8 = _coef44_weights(8)
+_W44_SIGN_8 = np.sign(_W44_8).astype(np.int64)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _dct_embed_nb_8x8(embedded, bits, start_block, blocks_x):
+        """
+        Numba kernel: embed bits[n] into 8x8 block start_block + n of `embedded` (uint8, in place).
+        Same algorithm as the NumPy path in dct_embed, block by block. The block size and
+        weights are compile-time constants, letting LLVM unroll the inner loops.
+        Serial on purpose: the app runs requests on threads, and Numba's parallel
+        workqueue layer aborts on concurrent use.
+        """
+        for n in range(bits.size):
+            k = start_block + n
+            sy = (k // blocks_x) * 8
+            sx = (k % blocks_x) * 8
+
+            coeff = np.float32(0.0)
+            for i in range(8):
+                for j in range(8):
+                    coeff += _W44_8[i, j] * np.float32(embedded[sy + i, sx + j])
+            rounded = np.rint(coeff)
+            need = (np.int64(rounded) & 1) ^ bits[n]
+            if need == 0:
+                continue
+
+            if coeff != rounded:
+                direction = math.copysign(1.0, coeff - rounded)
+            else:
+                direction = math.copysign(1.0, coeff)
+            steps = np.int64(np.rint(8.0 * (rounded + direction - coeff)))
+            step = 1 if steps > 0 else -1
+            remaining = abs(steps)
+            for i in range(8):
+                for j in range(8):
+                    if remaining == 0:
+                        break
+                    d = step * _W44_SIGN_8[i, j]
+                    p = np.int64(embedded[sy + i, sx + j])
+                    if (d > 0 and p < 255) or (d < 0 and p > 0):
+                        embedded[sy + i, sx + j] = np.uint8(p + d)
+                        remaining -= 1
+else:
+    _dct_embed_nb_8x8 = None
+
+
 def dct_embed(gray_image, message_bits, block_size=8, start_block=0):
     """
     Embed bits using parity of a chosen DCT coefficient (one bit per 8x8 block).
-    Operates on a single-channel (grayscale) image.
+    Operates on a single-channel (grayscale) uint8 image, modifying it in place; returns it.
+
+    A block whose (4,4) coefficient rounds to the wrong parity has that coefficient moved
+    to the neighbouring integer of the right parity. The move is made of whole +/-1 pixel
+    steps (each worth exactly 1/8 of the coefficient for 8x8 blocks), so it survives
+    storing the image as uint8.
     """
+    if block_size != 8:
+        raise ValueError("DCT embedding supports 8x8 blocks only.")
     h, w = gray_image.shape
-    embedded = gray_image.astype(np.float32).copy()
+    embedded = gray_image
     blocks_y = h // block_size
     blocks_x = w // block_size
     total_blocks = blocks_y * blocks_x
-    bits = [int(b) for b in message_bits]
+    bits = np.asarray(message_bits, dtype=np.uint8)
 
-    if start_block + len(bits) > total_blocks:
+    if start_block + bits.size > total_blocks:
         raise ValueError("DCT capacity too small for this payload part.")
+    if bits.size == 0:
+        return embedded
+    if _dct_embed_nb_8x8 is not None:
+        _dct_embed_nb_8x8(embedded, bits, start_block, blocks_x)
+        return embedded
+
+    # blocks are used in row-major order; read all (4,4) coefficients in one batch
+    blocks = _block_view(embedded, block_size)
+    ys, xs = np.divmod(np.arange(start_block, start_block + bits.size), blocks_x)
+    coeffs = np.einsum('nij,ij->n', blocks[ys, xs].astype(np.float32), _W44_8, optimize=True)
 
-    bit_idx = 0
-    # iterate block by block
-    for by in range(blocks_y):
-        for bx in range(blocks_x):
-            if bit_idx >= len(bits):
-                # done
-                return np.clip(embedded, 0, 255).astype(np.uint8)
-
-            sy, sx = by * block_size, bx * block_size
-            block = embedded[sy:sy + block_size, sx:sx + block_size]
-            dct_block = cv2.dct(block)
-            # choose a mid-band coefficient (4,4) — safe for 8x8
-            coeff = dct_block[4, 4]
-            desired = bits[bit_idx]
-            if (int(round(coeff)) & 1) != desired:
-                # flip parity by nudging coefficient
-                if coeff >= 0:
-                    dct_block[4, 4] = coeff + 1.0
-                else:
-                    dct_block[4, 4] = coeff - 1.0
-            block_recon = cv2.idct(dct_block)
-            embedded[sy:sy + block_size, sx:sx + block_size] = block_recon
-            bit_idx += 1
-
-    return np.clip(embedded, 0, 255).astype(np.uint8)
+    # choose a mid-band coefficient (4,4) — safe for 8x8
+    rounded = np.rint(coeffs)
+    need_flip = (rounded.astype(np.int32) & 1) != bits
+    ys, xs = ys[need_flip], xs[need_flip]
+    coeffs, rounded = coeffs[need_flip], rounded[need_flip]
+
+    # target: the neighbouring integer on the coefficient's side of its rounding
+    # (away from zero when it is already integral)
+    direction = np.copysign(np.float32(1.0), np.where(coeffs != rounded, coeffs - rounded, coeffs))
+    steps = np.rint(8 * (rounded + direction - coeffs)).astype(np.int64)
+
+    # spend |steps| unit pixel steps on the first pixels (row-major) that can move
+    # without clipping
+    pixels = blocks[ys, xs].astype(np.int64)
+    d = np.sign(steps)[:, None, None] * _W44_SIGN_8
+    movable = np.where(d > 0, pixels < 255, pixels > 0)
+    rank = np.cumsum(movable.reshape(-1, 64), axis=1).reshape(movable.shape)
+    chosen = movable & (rank <= np.abs(steps)[:, None, None])
+    blocks[ys, xs] = (pixels + d * chosen).astype(np.uint8)
+    return embedded
 
 
 def dct_extract(gray_image, length, block_size=8, start_block=0):
     """
-    Extract bits from DCT parity (single-channel). Returns list of ints.
+    Extract bits from DCT parity (single-channel). Returns uint8 array of bits (0/1).
     """
     h, w = gray_image.shape
     blocks_y = h // block_size
     blocks_x = w // block_size
     total_blocks = blocks_y * blocks_x
     if start_block >= total_blocks:
-        return []
-
-    extracted = []
-    bit_idx = 0
-    for by in range(blocks_y):
-        for bx in range(blocks_x):
-            if bit_idx >= length:
-                return extracted
-            sy, sx = by * block_size, bx * block_size
-            block = gray_image[sy:sy + block_size, sx:sx + block_size].astype(np.float32)
-            if block.shape[0] != block_size or block.shape[1] != block_size:
-                continue
-            dct_block = cv2.dct(block)
-            coef = dct_block[4, 4]
-            extracted.append(int(round(coef)) & 1)
-            bit_idx += 1
+        return np.zeros(0, dtype=np.uint8)
 
-    return extracted
+    stop_block = min(start_block + length, total_blocks)
+    blocks = _block_view(gray_image, block_size)
+    ys, xs = np.divmod(np.arange(start_block, stop_block), blocks_x)
+    # only coefficient (4,4) is needed: c4 . X . c4^T per block
+    weights = _coef44_weights(block_size)
+    coeffs = np.einsum('nij,ij->n', blocks[ys, xs].astype(np.float32), weights, optimize=True)
+    return (np.rint(coeffs).astype(np.int32) & 1).astype(np.uint8)
 
 
 # ===============================
@@ -119,55 +217,63 @@ def hybrid_embed(image_bgr, message_bits):
     Embed bits using:
       - Blue channel LSBs first (as many bits as Blue channel capacity allows)
       - Remaining bits (if any) in Green-channel DCT parity (one bit per 8x8 block)
-    image_bgr : uint8 BGR image
-    message_bits : list of ints (0/1)
+    image_bgr : uint8 BGR image, modified in place (copy it first to keep the cover)
+    message_bits : uint8 array of bits (0/1)
+    Returns `image_bgr`.
     """
     if image_bgr is None:
         raise ValueError("image is None")
     if image_bgr.ndim != 3 or image_bgr.shape[2] != 3:
         raise ValueError("Expected BGR color image")
 
-    b, g, r = cv2.split(image_bgr)
+    stego = image_bgr
+    message_bits = np.asarray(message_bits, dtype=np.uint8)
+    # zero-copy channel views; the embed functions write straight into `stego`
+    b = stego[:, :, 0]
     b_capacity = b.size
+
+    # common case: the payload fits in the Blue LSB plane, Green is left alone
+    if message_bits.size <= b_capacity:
+        lsb_embed(b, message_bits, start=0)
+        return stego
+
+    g = stego[:, :, 1]
     # DCT capacity = number of 8x8 blocks in green channel
     dct_capacity = (g.shape[0] // 8) * (g.shape[1] // 8)
 
     total_capacity = b_capacity + dct_capacity
-    if len(message_bits) > total_capacity:
-        raise ValueError(f"Payload too large for image. Need {len(message_bits)} bits, capacity {total_capacity}.")
-
-    # embed into Blue LSB first
-    if len(message_bits) <= b_capacity:
-        b_stego = lsb_embed(b.copy(), message_bits, start=0)
-        g_stego = g.copy()
-    else:
-        bits_b = message_bits[:b_capacity]
-        bits_g = message_bits[b_capacity:]
-        b_stego = lsb_embed(b.copy(), bits_b, start=0)
-        g_stego = dct_embed(g.copy(), bits_g, block_size=8, start_block=0)
+    if message_bits.size > total_capacity:
+        raise ValueError(f"Payload too large for image. Need {message_bits.size} bits, capacity {total_capacity}.")
 
-    stego = cv2.merge([b_stego, g_stego, r])
-    return stego.astype(np.uint8)
+    # Blue LSB first, the remainder in Green DCT parity
+    bits_b = message_bits[:b_capacity]
+    bits_g = message_bits[b_capacity:]
+    lsb_embed(b, bits_b, start=0)
+    dct_embed(g, bits_g, block_size=8, start_block=0)
+    return stego
 
 
-def hybrid_extract(image_bgr, total_length):
+def hybrid_extract(image_bgr, total_length, start=0):
     """
-    Extract first `total_length` bits using the hybrid layout described above.
-    Returns list of ints (0/1).
+    Extract `total_length` bits starting at bit `start` of the hybrid layout described above.
+    Returns uint8 array of bits (0/1).
     """
     if image_bgr is None:
-        return []
+        return np.zeros(0, dtype=np.uint8)
 
-    b, g, r = cv2.split(image_bgr)
+    b = image_bgr[:, :, 0]
     b_capacity = b.size
+    stop = start + total_length
+
+    if stop <= b_capacity:
+        return lsb_extract(b, total_length, start=start)
 
-    if total_length <= b_capacity:
-        return lsb_extract(b, total_length, start=0)
-    else:
-        bits_b = lsb_extract(b, b_capacity, start=0)
-        remaining = total_length - b_capacity
-        bits_g = dct_extract(g, remaining, block_size=8, start_block=0)
-        return bits_b + bits_g
+    g = image_bgr[:, :, 1]
+    bits_b = lsb_extract(b, max(b_capacity - start, 0), start=start)
+    start_block = max(start - b_capacity, 0)
+    remaining = stop - b_capacity - start_block
+    bits_g = dct_extract(g, remaining, block_size=8, start_block=start_block)
+    return np.concatenate([bits_b, bits_g])
 
 
 # ===============================
@@ -175,19 +281,15 @@ def hybrid_extract(image_bgr, total_length):
 # ===============================
 def text_to_bits(data: bytes):
     """
-    Convert bytes to list of bits (MSB-first per byte).
+    Convert bytes to uint8 array of bits (MSB-first per byte).
     """
-    return [int(bit) for byte in data for bit in format(byte, '08b')]
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
 
 
 def bits_to_text(bits):
     """
-    Convert list of bits to a UTF-8 string (ignore incomplete trailing byte).
+    Convert bits to a UTF-8 string (ignore incomplete trailing byte).
     """
-    byte_values = []
-    for i in range(0, len(bits), 8):
-        chunk = bits[i:i+8]
-        if len(chunk) < 8:
-            break
-        byte_values.append(int(''.join(map(str, chunk)), 2))
-    return bytes(byte_values).decode('utf-8', errors='ignore')
+    bits = np.asarray(bits, dtype=np.uint8)
+    n_bytes = bits.size // 8
+    return np.packbits(bits[:n_bytes * 8]).tobytes().decode('utf-8', errors='ignore')
@@ -2,10 +2,15 @@ import numpy as np
 import cv2
 import matplotlib.pyplot as plt
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; calculate_ssim falls back to OpenCV blurs
+    njit = None
+
 def calculate_mse(original, stego):
-    original = original.astype(np.float32)
-    stego = stego.astype(np.float32)
-    return float(np.mean((original - stego) ** 2))
+    # |a - b| fits in uint8; NORM_L2SQR sums the squares in one pass
+    diff = cv2.absdiff(original, stego)
+    return float(cv2.norm(diff, cv2.NORM_L2SQR)) / diff.size
 
 def calculate_psnr(original, stego):
     mse = calculate_mse(original, stego)
@@ -13,6 +18,74 @@ def calculate_psnr(original, stego):
         return float('inf')
     return 20.0 * np.log10(255.0 / np.sqrt(mse))
 
+if njit is not None:
+    # same 11-tap, sigma=1.5 kernel as cv2.GaussianBlur(..., (11, 11), 1.5)
+    _GAUSS_11 = cv2.getGaussianKernel(11, 1.5).ravel().astype(np.float32)
+
+    @njit(cache=True)
+    def _reflect101(i, n):
+        # OpenCV's default border: dcb|abcd|cba
+        if i < 0:
+            return -i
+        if i >= n:
+            return 2 * n - 2 - i
+        return i
+
+    @njit(fastmath=True, cache=True)
+    def _ssim_numba(img1, img2, g, C1, C2):
+        """
+        Mean SSIM of two float32 grayscale images with a separable Gaussian window.
+        The row pass blurs the five moments together; the column pass is fused with
+        the SSIM map and reduced per row, so no full-size map is materialized.
+        Serial: requests run on threads and the app pins one core per worker.
+        """
+        h, w = img1.shape
+        r = g.size // 2
+
+        rows = np.zeros((5, h, w), dtype=np.float32)
+        # row y padded with reflected borders, one plane per moment, so the tap loops
+        # below are branch-free and vectorize
+        padded = np.empty((5, w + 2 * r), dtype=np.float32)
+        for y in range(h):
+            for x in range(w + 2 * r):
+                xx = _reflect101(x - r, w)
+                a = img1[y, xx]
+                b = img2[y, xx]
+                padded[0, x] = a
+                padded[1, x] = b
+                padded[2, x] = a * a
+                padded[3, x] = b * b
+                padded[4, x] = a * b
+            for k in range(2 * r + 1):
+                wk = g[k]
+                for c in range(5):
+                    for x in range(w):
+                        rows[c, y, x] += wk * padded[c, x + k]
+
+        row_sums = np.zeros(h, dtype=np.float64)
+        for y in range(h):
+            # column pass for output row y: accumulate whole rows so access stays contiguous
+            mom = np.zeros((5, w), dtype=np.float32)
+            for k in range(-r, r + 1):
+                yy = _reflect101(y + k, h)
+                wk = g[k + r]
+                for c in range(5):
+                    for x in range(w):
+                        mom[c, x] += wk * rows[c, yy, x]
+            acc = 0.0
+            for x in range(w):
+                mu1, mu2 = mom[0, x], mom[1, x]
+                mu1_sq, mu2_sq, mu1_mu2 = mu1*mu1, mu2*mu2, mu1*mu2
+                sigma1_sq = mom[2, x] - mu1_sq
+                sigma2_sq = mom[3, x] - mu2_sq
+                sigma12 = mom[4, x] - mu1_mu2
+                acc += ((2*mu1_mu2 + C1)*(2*sigma12 + C2)) / ((mu1_sq+mu2_sq+C1)*(sigma1_sq+sigma2_sq+C2))
+            row_sums[y] = acc
+        return row_sums.sum() / (h * w)
+else:
+    _ssim_numba = None
+
+
 def calculate_ssim(img1, img2):
     # basic SSIM implementation (grayscale)
     K1, K2 = 0.01, 0.03
@@ -24,16 +97,25 @@ def calculate_ssim(img1, img2):
     if img2.ndim == 3:
         img2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
 
-    img1 = img1.astype(np.float64)
-    img2 = img2.astype(np.float64)
+    if img1.shape != img2.shape:
+        raise ValueError(f"SSIM needs images of the same size, got {img1.shape} and {img2.shape}.")
+
+    img1 = img1.astype(np.float32)
+    img2 = img2.astype(np.float32)
+
+    # the Numba kernel's single reflection needs each side longer than the window radius
+    if _ssim_numba is not None and min(img1.shape) > 5:
+        return float(_ssim_numba(img1, img2, _GAUSS_11, np.float32(C1), np.float32(C2)))
 
-    mu1 = cv2.GaussianBlur(img1, (11, 11), 1.5)
-    mu2 = cv2.GaussianBlur(img2, (11, 11), 1.5)
+    # blur all five moments in one multi-channel pass
+    stacked = np.stack([img1, img2, img1*img1, img2*img2, img1*img2], axis=-1)
+    blurred = cv2.GaussianBlur(stacked, (11, 11), 1.5)
+    mu1, mu2 = blurred[..., 0], blurred[..., 1]
 
     mu1_sq, mu2_sq, mu1_mu2 = mu1*mu1, mu2*mu2, mu1*mu2
-    sigma1_sq = cv2.GaussianBlur(img1*img1, (11, 11), 1.5) - mu1_sq
-    sigma2_sq = cv2.GaussianBlur(img2*img2, (11, 11), 1.5) - mu2_sq
-    sigma12   = cv2.GaussianBlur(img1*img2, (11, 11), 1.5) - mu1_mu2
+    sigma1_sq = blurred[..., 2] - mu1_sq
+    sigma2_sq = blurred[..., 3] - mu2_sq
+    sigma12   = blurred[..., 4] - mu1_mu2
 
     ssim_map = ((2*mu1_mu2 + C1)*(2*sigma12 + C2)) / ((mu1_sq+mu2_sq+C1)*(sigma1_sq+sigma2_sq+C2))
     return float(ssim_map.mean())
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import lsb_dct
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_dct_embed_backends_match(seed, monkeypatch):
+    """The Numba kernel and the NumPy fallback must produce the same stego pixels."""
+    if lsb_dct._dct_embed_nb_8x8 is None:
+        pytest.skip("numba not installed")
+    rng = np.random.default_rng(seed)
+    h, w = rng.integers(8, 160, size=2)
+    gray = rng.integers(0, 256, (h, w), dtype=np.uint8)
+    total_blocks = (h // 8) * (w // 8)
+    start_block = int(rng.integers(0, total_blocks))
+    bits = rng.integers(0, 2, total_blocks - start_block).astype(np.uint8)
+
+    with_numba = lsb_dct.dct_embed(gray.copy(), bits, start_block=start_block)
+    monkeypatch.setattr(lsb_dct, "_dct_embed_nb_8x8", None)
+    with_numpy = lsb_dct.dct_embed(gray.copy(), bits, start_block=start_block)
+
+    np.testing.assert_array_equal(with_numba, with_numpy)
+
+
+@pytest.mark.parametrize("fill", [None, 0, 128, 255])
+def test_dct_embed_extract_round_trip(fill, dct_backend):
+    rng = np.random.default_rng(1)
+    if fill is None:
+        gray = rng.integers(0, 256, (64, 72), dtype=np.uint8)
+    else:
+        gray = np.full((64, 72), fill, dtype=np.uint8)
+    bits = rng.integers(0, 2, 8 * 9).astype(np.uint8)
+
+    stego = lsb_dct.dct_embed(gray.copy(), bits)
+
+    np.testing.assert_array_equal(lsb_dct.dct_extract(stego, bits.size), bits)
+    assert np.abs(stego.astype(int) - gray).max() <= 1
+
+
+@pytest.mark.parametrize("start, length", [
+    (0, 32), (32, 100), (4000, 96), (4095, 2), (4096, 20), (4090, 60), (4100, 50), (0, 4176),
+])
+def test_hybrid_extract_offset_matches_full_read(start, length):
+    """Reading at an offset must equal the same slice of a full read, across Blue LSB -> Green DCT."""
+    image = np.random.default_rng(3).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    full = lsb_dct.hybrid_extract(image, 64 * 64 + 8 * 8)
+
+    part = lsb_dct.hybrid_extract(image, length, start=start)
+
+    np.testing.assert_array_equal(part, full[start:start + length])
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import metrics
+
+
+@pytest.mark.parametrize("shape", [(6, 6), (6, 40), (7, 9), (12, 11), (64, 80), (6, 40, 3), (50, 37, 3)])
+def test_ssim_numba_matches_opencv(shape, monkeypatch):
+    """The hand-written reflect-101 Gaussian must agree with cv2.GaussianBlur."""
+    if metrics._ssim_numba is None:
+        pytest.skip("numba not installed")
+    rng = np.random.default_rng(sum(shape))
+    img1 = rng.integers(0, 256, shape, dtype=np.uint8)
+    img2 = np.clip(img1.astype(int) + rng.integers(-20, 21, shape), 0, 255).astype(np.uint8)
+
+    with_numba = metrics.calculate_ssim(img1, img2)
+    monkeypatch.setattr(metrics, "_ssim_numba", None)
+    with_opencv = metrics.calculate_ssim(img1, img2)
+
+    assert with_numba == pytest.approx(with_opencv, abs=1e-5)
+
+
+def test_ssim_rejects_mismatched_shapes():
+    rng = np.random.default_rng(0)
+    img1 = rng.integers(0, 256, (50, 60), dtype=np.uint8)
+    img2 = rng.integers(0, 256, (30, 40), dtype=np.uint8)
+
+    with pytest.raises(ValueError):
+        metrics.calculate_ssim(img1, img2)
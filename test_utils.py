@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from utils import embed_message, extract_message
+
+
+def test_message_round_trip_spills_into_dct(dct_backend):
+    # 64x64 has 4096 Blue LSBs; 4 + 515 bytes needs 4152 bits, so 56 go to Green DCT
+    image = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    message = "a" * 515
+
+    assert extract_message(embed_message(image, message)) == message
+
+
+def test_extract_rejects_length_beyond_capacity():
+    image = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    image[0, :32, 0] |= 1  # header reads 0xFFFFFFFF bytes
+
+    with pytest.raises(ValueError, match="capacity"):
+        extract_message(image)
@@ -2,30 +2,41 @@
 import cv2
 import numpy as np
 import hashlib
+import functools
 from lsb_dct import hybrid_embed, hybrid_extract, text_to_bits, bits_to_text
 
 # ------------ helpers ------------
-def _len_prefix_bits(n_bytes: int) -> list[int]:
-    """32-bit big-endian length (bytes) as list of bits."""
-    return [int(b) for b in f"{n_bytes:032b}"]
+@functools.lru_cache(maxsize=128)
+def _key_tags(key: str) -> tuple[str, str]:
+    """(prefix, suffix) tags derived from the SHA-256 of the key."""
+    h = hashlib.sha256(key.encode()).digest().hex()
+    return h[:16], h[-16:]
 
 
 def _apply_key_wrap(message: str, key: str | None) -> str:
     if not key:
         return message
-    h = hashlib.sha256(str(key).encode()).hexdigest()
-    return f"{h[:16]}{message}{h[-16:]}"
+    prefix, suffix = _key_tags(key)
+    return f"{prefix}{message}{suffix}"
 
 
 def _remove_key_wrap(wrapped: str, key: str | None) -> str:
     if not key:
         return wrapped
-    h = hashlib.sha256(str(key).encode()).hexdigest()
-    if wrapped.startswith(h[:16]) and wrapped.endswith(h[-16:]):
+    prefix, suffix = _key_tags(key)
+    if wrapped.startswith(prefix) and wrapped.endswith(suffix):
         return wrapped[16:-16]
     return "Invalid Key!"
 
 
+def _capacity_bits(image_bgr: np.ndarray) -> int:
+    """Hybrid capacity in bits: Blue LSB capacity + Green DCT capacity."""
+    h, w = image_bgr.shape[:2]
+    b_capacity = h * w  # blue channel LSB capacity (one bit per pixel element)
+    dct_capacity = (h // 8) * (w // 8)  # one bit per 8x8 block in green channel
+    return b_capacity + dct_capacity
+
+
 # ------------ embedding / extraction using HYBRID LSB + DCT ------------
 def embed_message(image_bgr: np.ndarray,
                   message: str,
@@ -40,42 +51,39 @@ def embed_message(image_bgr: np.ndarray,
     wrapped = _apply_key_wrap(message, key)
     payload_bytes = wrapped.encode("utf-8")
 
-    header_bits = _len_prefix_bits(len(payload_bytes))  # 32 bits
-    payload_bits = text_to_bits(payload_bytes)         # list of ints from bytes
-    all_bits = header_bits + payload_bits
+    header = len(payload_bytes).to_bytes(4, "big")  # 32-bit length prefix
+    all_bits = text_to_bits(header + payload_bytes)  # header + payload in one pass
 
-    # capacity = Blue LSB capacity + Green DCT capacity
-    h, w = image_bgr.shape[:2]
-    b_capacity = h * w  # blue channel LSB capacity (one bit per pixel element)
-    dct_capacity = (h // 8) * (w // 8)  # one bit per 8x8 block in green channel
-    total_capacity = b_capacity + dct_capacity
-
-    if len(all_bits) > total_capacity:
-        raise ValueError(f"Message too large! Need {len(all_bits)} bits, capacity {total_capacity}.")
+    total_capacity = _capacity_bits(image_bgr)
+    if all_bits.size > total_capacity:
+        raise ValueError(f"Message too large! Need {all_bits.size} bits, capacity {total_capacity}.")
 
+    # the only full-image copy on the encode path; hybrid_embed writes into it
     stego_bgr = hybrid_embed(image_bgr.copy(), all_bits)
     return stego_bgr
 
 
 def extract_message(stego_bgr: np.ndarray, key: str | None = None) -> str:
     """
-    Read 32-bit header first, compute payload length (bytes), then extract exact bit count.
+    Read 32-bit header first, compute payload length (bytes), then extract exactly that many
+    bits right after the header.
     """
     if stego_bgr is None or stego_bgr.size == 0:
         raise ValueError("Invalid image array.")
 
     header_bits = hybrid_extract(stego_bgr, 32)
-    if len(header_bits) < 32:
+    if header_bits.size < 32:
         raise ValueError("Failed to read header bits from image.")
 
-    msg_len_bytes = int(''.join(map(str, header_bits)), 2)
-    total_bits = 32 + msg_len_bytes * 8
+    msg_len_bytes = int(np.packbits(header_bits[:32]).view('>u4')[0])
+    payload_len = msg_len_bytes * 8
+
+    # a non-stego image yields a random header; don't trust it beyond the capacity
+    if payload_len > _capacity_bits(stego_bgr) - 32:
+        raise ValueError("No hidden message found (length header exceeds image capacity).")
 
-    all_bits = hybrid_extract(stego_bgr, total_bits)
-    if len(all_bits) < total_bits:
-        # pad with zeros if truncated (shouldn't happen when capacities were checked)
-        all_bits += [0] * (total_bits - len(all_bits))
+    # payload follows the header; don't re-read the 32 header bits
+    payload_bits = hybrid_extract(stego_bgr, payload_len, start=32)
 
-    payload_bits = all_bits[32:]
     recovered = bits_to_text(payload_bits)
     return _remove_key_wrap(recovered, key)